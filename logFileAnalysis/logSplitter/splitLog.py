@@ -3,6 +3,8 @@ import re
 import sys
 import argparse
 import json
+import sqlite3
+from contextlib import contextmanager
 from collections import defaultdict
 
 def read_json_config(config_file_path):
@@ -78,7 +80,8 @@ def print_help():
     """
     Prints the usage instructions for the script.
     """
-    print("Usage: python script_name.py <log_file_name_pattern> [--config <json_config_file_path>] [--output-dir <directory>]")
+    print("Usage: python script_name.py <log_file_name_pattern> [--config <json_config_file_path>] [--output-dir <directory>] [--sqlite] [--sqlite-db <db_path>]")
+    print("       python script_name.py query <fts_query> [--db <db_path>] [--limit <n>]")
     print("       python script_name.py [-h | --help] [-s | --sample-json]")
     print("\nArguments:")
     print("  <log_file_name_pattern> : Regular expression pattern to match input log file names.")
@@ -89,6 +92,9 @@ def print_help():
     print("                                     Defaults to 'splitLog.json' if not specified.")
     print("  --output-dir <directory> : Directory where the extracted log blocks will be saved.")
     print("                             Defaults to 'processed/'.")
+    print("  --sqlite                 : Also load every block into a SQLite database with a full-text (FTS5) index.")
+    print("  --sqlite-db <db_path>    : SQLite database to load blocks into. Implies --sqlite.")
+    print("                             Defaults to '<output-dir>/blocks.db'.")
     print("  -s, --sample-json            : Print an example 'splitLog.json' configuration and exit.")
     print("  -h, --help               : Show this help message and exit.")
     print("\nExample JSON Configuration ('splitLog.json' or custom config):")
@@ -114,8 +120,16 @@ def print_help():
     print("    python script_name.py '.*\\.log$' --config 'my_config.json'")
     print("\n  To extract blocks and save them to a custom directory 'my_extracted_logs':")
     print("    python script_name.py '.*\\.log$' --config 'config.json' --output-dir my_extracted_logs")
+    print("\n  To also load all blocks into 'processed/blocks.db' for fast searching:")
+    print("    python script_name.py '.*\\.log$' --sqlite")
     print("\n  To print a sample JSON configuration:")
     print("    python script_name.py -s")
+    print("\nQuery subcommand:")
+    print("  query <fts_query>        : Print all blocks stored with --sqlite whose text matches an FTS5 query.")
+    print("    --db <db_path>         : SQLite database to query. Defaults to 'processed/blocks.db'.")
+    print("    --limit <n>            : Print at most <n> blocks.")
+    print("  Example:")
+    print("    python script_name.py query '\"Connection refused\" OR timeout'")
     print("\nOutput:")
     print("  Matching log blocks will be appended to the specified output files in the output directory.")
     print("  Blocks not matching any pattern, OR blocks matching a pattern with '\"keep\": true',")
@@ -165,7 +179,258 @@ def print_sample_json():
     print("------------------------------------------")
 
 
-def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir):
+class SqliteBlockStore:
+    """
+    Loads log blocks into a local SQLite database so they can be searched repeatedly
+    without rescanning the processed output files.
+
+    Blocks are stored in the 'blocks' table together with their timestamp, source file
+    (absolute path), byte offset and the destination files they were routed to. The 'blocks_fts'
+    FTS5 table indexes the block text (external content, keyed on blocks.id).
+    Inserts are buffered and written in one transaction per batch.
+
+    The 'sources' table records the size and modification time of every fully loaded source file.
+    An unchanged file is skipped on later runs; a changed (e.g. rotated) file has its earlier
+    blocks replaced.
+
+    If writing to the database fails (e.g. it is locked or the disk is full), the error is
+    reported once and loading stops; later calls do nothing, so splitting can carry on.
+    """
+
+    def __init__(self, db_path, batch_size=50000):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file. Created if it does not exist;
+                           new blocks are added to it if it does.
+            batch_size (int): Number of blocks buffered before they are written in one transaction.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pending_rows = []
+        self.blocks_stored = 0
+        self.files_skipped = 0
+        self.current_source = None # (path, size, mtime_ns) of the file being loaded
+        self.failed = False
+        # Transactions are opened explicitly (see _write_transaction) rather than by the sqlite3 module
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        # WAL keeps blocks from earlier runs safe and lets a failed batch roll back.
+        # synchronous=OFF only risks losing the last batches on an OS crash, not corrupting the file.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA cache_size=-200000")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT,
+                source_file TEXT NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                destinations TEXT NOT NULL,
+                text TEXT NOT NULL,
+                UNIQUE (source_file, byte_offset)
+            );
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+                text, content='blocks', content_rowid='id'
+            );
+        """)
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Runs the enclosed statements in one transaction that holds the write lock from the start,
+        so reads inside it (e.g. MAX(id)) cannot race with another process loading the same database.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _stop_loading(self, error):
+        """
+        Reports a failed database write and stops loading. Batches committed before the
+        failure stay in the database; the failed batch was rolled back.
+        """
+        print(f"Error: Writing to SQLite database '{self.db_path}' failed: {error}")
+        print("       No further blocks will be loaded into it; the split output files are still written.")
+        self.failed = True
+        self.pending_rows = []
+        self.conn.close()
+
+    def begin_source(self, source_filepath):
+        """
+        Starts loading blocks from a source file.
+
+        Args:
+            source_filepath (str): Path of the input log file.
+
+        Returns:
+            bool: False if the file is already stored with the same size and modification time,
+                  in which case its blocks should not be added again. True otherwise; any blocks
+                  stored earlier for this path are removed.
+        """
+        if self.failed:
+            return False
+        path = os.path.abspath(source_filepath)
+        stat = os.stat(path)
+        # Blocks queued for a file whose processing was aborted are not written; as that file
+        # was never recorded in 'sources', it is loaded again on the next run
+        self.pending_rows = []
+        try:
+            stored = self.conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (path,)).fetchone()
+            if stored == (stat.st_size, stat.st_mtime_ns):
+                self.files_skipped += 1
+                return False
+
+            with self._write_transaction():
+                # External-content FTS entries must be deleted with the exact text they were indexed with
+                self.conn.execute(
+                    "INSERT INTO blocks_fts (blocks_fts, rowid, text) "
+                    "SELECT 'delete', id, text FROM blocks WHERE source_file = ?",
+                    (path,)
+                )
+                self.conn.execute("DELETE FROM blocks WHERE source_file = ?", (path,))
+                self.conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+        except sqlite3.Error as e:
+            self._stop_loading(e)
+            return False
+        self.current_source = (path, stat.st_size, stat.st_mtime_ns)
+        return True
+
+    def end_source(self):
+        """
+        Writes the remaining blocks of the current source file and records it as fully loaded.
+        A file whose loading is interrupted is not recorded, so it is loaded again on the next run.
+        """
+        self.flush()
+        if self.failed:
+            return
+        try:
+            with self._write_transaction():
+                self.conn.execute("INSERT INTO sources (path, size, mtime_ns) VALUES (?, ?, ?)", self.current_source)
+        except sqlite3.Error as e:
+            self._stop_loading(e)
+            return
+        self.current_source = None
+
+    def add_block(self, timestamp, byte_offset, destinations, block_lines):
+        """
+        Queues a block of the current source file for insertion, flushing the batch once it is full.
+
+        Args:
+            timestamp (str or None): Timestamp that opened the block, e.g. '[10:48:42,953]'.
+            byte_offset (int): Offset of the block's first line in the source file.
+            destinations (iterable of str): Output files the block was written to.
+            block_lines (list of str): Lines of the block.
+        """
+        if self.failed:
+            return
+        self.pending_rows.append((
+            timestamp,
+            self.current_source[0],
+            byte_offset,
+            ",".join(sorted(destinations)),
+            "".join(block_lines)
+        ))
+        if len(self.pending_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all queued blocks and their full-text index entries in a single transaction.
+        """
+        if self.failed or not self.pending_rows:
+            return
+        try:
+            with self._write_transaction():
+                # SQLite assigns ids above the current maximum, so the rows added by this batch are exactly id > max_id
+                max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM blocks").fetchone()[0]
+                self.conn.executemany(
+                    "INSERT INTO blocks (timestamp, source_file, byte_offset, destinations, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self.pending_rows
+                )
+                self.conn.execute(
+                    "INSERT INTO blocks_fts (rowid, text) SELECT id, text FROM blocks WHERE id > ?",
+                    (max_id,)
+                )
+        except sqlite3.Error as e:
+            self._stop_loading(e)
+            return
+        self.blocks_stored += len(self.pending_rows)
+        self.pending_rows = []
+
+    def close(self):
+        """
+        Closes the database. Blocks of a source file that was not finished with end_source are discarded.
+        """
+        if self.failed:
+            return
+        self.pending_rows = []
+        try:
+            self.conn.close()
+        except sqlite3.Error as e:
+            self._stop_loading(e)
+
+
+def query_block_store(db_path, fts_query, limit=None):
+    """
+    Prints every stored block whose text matches an FTS5 query, in source file and offset order.
+
+    Args:
+        db_path (str): Path to the SQLite database created with --sqlite.
+        fts_query (str): FTS5 query expression, e.g. '"Connection refused"' or 'timeout AND gateway'.
+        limit (int or None): Maximum number of blocks to print. All matches if None.
+    """
+    if not os.path.isfile(db_path):
+        print(f"Error: SQLite database not found at '{db_path}'. Run the splitter with --sqlite first.")
+        sys.exit(1)
+
+    sql = ("SELECT b.timestamp, b.source_file, b.byte_offset, b.destinations, b.text "
+           "FROM blocks_fts JOIN blocks AS b ON b.id = blocks_fts.rowid "
+           "WHERE blocks_fts MATCH ? ORDER BY b.source_file, b.byte_offset")
+    params = [fts_query]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        existing_tables = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('blocks', 'blocks_fts')"
+        )}
+    except sqlite3.DatabaseError as e:
+        conn.close()
+        print(f"Error: '{db_path}' is not a usable SQLite database: {e}")
+        sys.exit(1)
+    if existing_tables != {'blocks', 'blocks_fts'}:
+        conn.close()
+        print(f"Error: '{db_path}' does not contain a block store. Run the splitter with --sqlite to create one.")
+        sys.exit(1)
+
+    matched_blocks = 0
+    try:
+        for timestamp, source_file, byte_offset, destinations, text in conn.execute(sql, params):
+            matched_blocks += 1
+            print(f"==> {source_file} @ {byte_offset} {timestamp or ''} -> {destinations or '(none)'}")
+            sys.stdout.write(text)
+            if not text.endswith("\n"):
+                sys.stdout.write("\n")
+    except sqlite3.OperationalError as e:
+        print(f"Error: Invalid query '{fts_query}': {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"--- {matched_blocks} matching block(s) ---")
+
+
+def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir, sqlite_db_path=None):
     """
     Extracts log blocks matching patterns from specified log files and copies them
     to separate output files based on a JSON configuration. Blocks not matching any
@@ -177,6 +442,8 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
         log_file_name_pattern (str): Regex pattern for input log files.
         json_config_file_path (str): Path to the JSON config file.
         output_dir (str): Directory to save extracted blocks.
+        sqlite_db_path (str or None): If set, every block is also loaded into this SQLite
+                                      database with a full-text index (see SqliteBlockStore).
     """
     # Create the output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
@@ -241,6 +508,25 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
         print(f"\nNo log files found matching the pattern '{log_file_name_pattern}'. Exiting.")
         sys.exit(0)
 
+    block_store = None
+    if sqlite_db_path:
+        sqlite_db_dir = os.path.dirname(sqlite_db_path)
+        if sqlite_db_dir and not os.path.isdir(sqlite_db_dir):
+            print(f"Error: Directory for SQLite database '{sqlite_db_path}' does not exist.")
+            sys.exit(1)
+        try:
+            block_store = SqliteBlockStore(sqlite_db_path)
+        except sqlite3.OperationalError as e:
+            if "fts5" in str(e):
+                print(f"Error: This Python's SQLite build (version {sqlite3.sqlite_version}) does not support FTS5: {e}")
+            else:
+                print(f"Error: Could not open SQLite database '{sqlite_db_path}': {e}")
+            sys.exit(1)
+        except sqlite3.DatabaseError as e:
+            print(f"Error: '{sqlite_db_path}' is not a usable SQLite database: {e}")
+            sys.exit(1)
+        print(f"Loading blocks into SQLite database '{sqlite_db_path}'.")
+
     print("\n--- Processing Log Files ---")
     for log_filename in matching_log_files:
         print(f"\nProcessing file: {log_filename}")
@@ -258,11 +544,28 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
         block_destination_files = set() 
         block_should_also_keep_unmatched_by_pattern = False # Flag for pattern-level keep
         block_should_also_keep_unmatched_by_file = False # Flag for file-level keep_all_blocks
+        block_timestamp = None
+        block_byte_offset = 0
+        next_line_byte_offset = 0 # Only tracked when loading into SQLite
 
         try:
-            with open(input_filepath, 'r', encoding='utf-8') as infile:
+            store_blocks_of_file = block_store is not None and block_store.begin_source(input_filepath)
+            if block_store and not store_blocks_of_file and not block_store.failed:
+                print(f"'{log_filename}' is unchanged since it was loaded into the SQLite database, not loading it again.")
+
+            # newline='' still splits on '\n', '\r\n' and '\r' but keeps the original line endings,
+            # so byte offsets can be counted on the raw line before it is normalized to '\n'
+            with open(input_filepath, 'r', encoding='utf-8', newline='') as infile:
                 for line_num, line in enumerate(infile, 1):
-                    if timestamp_regex.search(line):
+                    line_byte_offset = next_line_byte_offset
+                    if store_blocks_of_file:
+                        next_line_byte_offset += len(line.encode('utf-8'))
+                    if line.endswith('\r\n'):
+                        line = line[:-2] + '\n'
+                    elif line.endswith('\r'):
+                        line = line[:-1] + '\n'
+                    timestamp_match = timestamp_regex.search(line)
+                    if timestamp_match:
                         # New block started, process the previous block if it exists
                         if block_buffer:
                             blocks_read_in_file += 1
@@ -285,9 +588,17 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
                                     for buffered_line in block_buffer:
                                         outfile.write(buffered_line)
                                 unmatched_blocks_in_file += 1
+                                if store_blocks_of_file:
+                                    block_destination_files.add(os.path.basename(unmatched_output_file_for_this_log))
+
+                            if store_blocks_of_file:
+                                block_store.add_block(block_timestamp, block_byte_offset,
+                                                      block_destination_files, block_buffer)
                         
                         # Start new block
                         block_buffer = [line]
+                        block_timestamp = timestamp_match.group(0)
+                        block_byte_offset = line_byte_offset
                         block_destination_files = set() # Reset for the new block
                         block_should_also_keep_unmatched_by_pattern = False # Reset pattern keep flag
                         block_should_also_keep_unmatched_by_file = False # Reset file keep flag
@@ -328,6 +639,15 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
                             for buffered_line in block_buffer:
                                 outfile.write(buffered_line)
                         unmatched_blocks_in_file += 1
+                        if store_blocks_of_file:
+                            block_destination_files.add(os.path.basename(unmatched_output_file_for_this_log))
+
+                    if store_blocks_of_file:
+                        block_store.add_block(block_timestamp, block_byte_offset,
+                                              block_destination_files, block_buffer)
+
+            if store_blocks_of_file:
+                block_store.end_source()
 
             processed_files_count += 1
             total_blocks_read += blocks_read_in_file
@@ -338,14 +658,41 @@ def extract_log_blocks(log_file_name_pattern, json_config_file_path, output_dir)
         except Exception as e:
             print(f"Error processing file '{log_filename}': {e}")
 
+    if block_store:
+        block_store.close()
+
     print("\n--- Script Summary ---")
     print(f"Total log files processed: {processed_files_count}")
     print(f"Total blocks read across all processed files: {total_blocks_read}")
     print(f"Total blocks extracted to specific files: {total_blocks_extracted}")
     print(f"Total blocks written to individual 'unmatched' files: {total_unmatched_blocks}")
     print(f"All extracted blocks are located in the '{output_dir}/' directory.")
+    if block_store and block_store.failed:
+        print(f"Loading into SQLite database '{sqlite_db_path}' stopped after an error; "
+              f"{block_store.blocks_stored} blocks were loaded in this run before it. Re-run with --sqlite to complete it.")
+    elif block_store:
+        print(f"Total blocks loaded into SQLite database '{sqlite_db_path}': {block_store.blocks_stored} "
+              f"(skipped {block_store.files_skipped} unchanged file(s))")
 
 if __name__ == "__main__":
+    # The query subcommand has its own arguments, so handle it before the extraction parser
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        query_parser = argparse.ArgumentParser(
+            prog=f"{os.path.basename(sys.argv[0])} query",
+            description="Prints stored log blocks matching an FTS5 query."
+        )
+        query_parser.add_argument('fts_query', type=str, help="FTS5 query expression.")
+        query_parser.add_argument(
+            '--db',
+            type=str,
+            default=os.path.join('processed', 'blocks.db'),
+            help="SQLite database created with --sqlite. Defaults to 'processed/blocks.db'."
+        )
+        query_parser.add_argument('--limit', type=int, default=None, help="Maximum number of blocks to print.")
+        query_args = query_parser.parse_args(sys.argv[2:])
+        query_block_store(query_args.db, query_args.fts_query, query_args.limit)
+        sys.exit(0)
+
     # Check for help or sample-json argument directly in sys.argv before argparse tries to parse
     if '-h' in sys.argv or '--help' in sys.argv:
         print_help()
@@ -376,6 +723,17 @@ if __name__ == "__main__":
         default='processed',
         help="Directory where the extracted log blocks will be saved. Defaults to 'processed/'."
     )
+    parser.add_argument(
+        '--sqlite',
+        action='store_true',
+        help="Also load every block into a SQLite database with a full-text index."
+    )
+    parser.add_argument(
+        '--sqlite-db',
+        type=str,
+        default=None,
+        help="SQLite database to load blocks into. Implies --sqlite. Defaults to '<output-dir>/blocks.db'."
+    )
     parser.add_argument(
         '-s', '--sample-json',
         action='store_true',
@@ -392,8 +750,13 @@ if __name__ == "__main__":
         print_help()
         sys.exit(1)
 
+    sqlite_db_path = args.sqlite_db
+    if args.sqlite and sqlite_db_path is None:
+        sqlite_db_path = os.path.join(args.output_dir, 'blocks.db')
+
     extract_log_blocks(
         args.log_file_name_pattern,
         args.config,
-        args.output_dir
+        args.output_dir,
+        sqlite_db_path
     )